@@ -2,54 +2,124 @@
 """
 Matrixon Matrix Server Test Suite
 Enhanced test script to validate core Matrix functionality
+
+Requires: pip install "httpx[http2]" orjson
 """
 
-import requests
-import json
+import argparse
+import asyncio
+import httpx
+import itertools
+import orjson
 import time
 import sys
-from urllib.parse import urljoin
+
+# Shared client pool size; bulk sends keep at most this many requests in flight
+MAX_CONNECTIONS = 64
+
+# Static request bodies, serialized once
+JSON_HEADERS = {"Content-Type": "application/json"}
+ROOM_BODY = orjson.dumps({
+    "name": "Test Room",
+    "topic": "A room for testing Matrixon functionality",
+    "preset": "private_chat"
+})
+MESSAGE_BODY = orjson.dumps({
+    "msgtype": "m.text",
+    "body": "Hello from Matrixon test suite! 🚀"
+})
+
+# test_sync only reads next_batch and the joined room IDs, so ask the server
+# to leave out event payloads entirely
+SYNC_FILTER = orjson.dumps({
+    "presence": {"types": []},
+    "account_data": {"types": []},
+    "room": {
+        "timeline": {"limit": 0},
+        "state": {"types": []},
+        "ephemeral": {"types": []},
+        "account_data": {"types": []}
+    }
+}).decode()
 
 class MatrixTester:
-    def __init__(self, base_url="http://localhost:8008"):
+    def __init__(self, base_url="http://localhost:8008", bulk_messages=0):
         self.base_url = base_url
+        self.bulk_messages = bulk_messages
+        # Unique transaction IDs, even for sends within the same second
+        self._txn = itertools.count(int(time.time() * 1000))
         self.access_token = None
         self.user_id = None
         self.device_id = None
         
-    def test_server_health(self):
+        # One pooled keep-alive client shared by every (concurrent) test.
+        # HTTP/2 is negotiated via TLS ALPN only, so requests share one
+        # multiplexed connection for https:// URLs; plain http:// (the
+        # localhost default) stays on HTTP/1.1 keep-alive connections.
+        # The pool is sized for bulk bursts, connect failures are retried,
+        # and short connect/pool timeouts fail fast instead of queueing forever.
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=3,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=32)
+        )
+        self.client = httpx.AsyncClient(
+            transport=transport,
+            base_url=self.base_url,
+            timeout=httpx.Timeout(10.0, connect=3.0, pool=5.0)
+        )
+        
+    async def wait_for_server(self, max_wait):
+        """Poll the versions endpoint with backoff until it answers or max_wait passes"""
+        deadline = time.monotonic() + max_wait
+        backoff = 0.1
+        # Separate client without transport retries, so a refused connection
+        # fails at once and the backoff below alone paces the probes
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=2) as probe:
+            while time.monotonic() < deadline:
+                try:
+                    response = await probe.get("/_matrix/client/versions")
+                    if response.status_code == 200:
+                        return True
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 2.0)
+        return False
+    
+    async def test_server_health(self):
         """Test if the Matrix server is responding"""
         print("🔍 Testing server health...")
         try:
-            response = requests.get(f"{self.base_url}/_matrix/client/versions", timeout=30)
+            response = await self.client.get("/_matrix/client/versions", timeout=30)
             if response.status_code == 200:
-                versions = response.json()
+                versions = orjson.loads(response.content)
                 print(f"✅ Server is running! Supported versions: {versions.get('versions', [])}")
                 return True
             else:
                 print(f"❌ Server returned status {response.status_code}")
                 return False
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             print(f"❌ Server health check failed: {e}")
             return False
     
-    def test_federation_status(self):
+    async def test_federation_status(self):
         """Test federation capabilities"""
         print("🔍 Testing federation status...")
         try:
-            response = requests.get(f"{self.base_url}/_matrix/federation/v1/version", timeout=30)
+            response = await self.client.get("/_matrix/federation/v1/version", timeout=30)
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 print(f"✅ Federation is working! Server: {data.get('server', {})}")
                 return True
             else:
                 print(f"⚠️ Federation endpoint returned status {response.status_code}")
                 return False
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             print(f"⚠️ Federation test failed: {e}")
             return False
     
-    def test_user_registration(self):
+    async def test_user_registration(self):
         """Test user registration"""
         print("🔍 Testing user registration...")
         try:
@@ -63,15 +133,16 @@ class MatrixTester:
                 "initial_device_display_name": "Test Device"
             }
             
-            response = requests.post(
-                f"{self.base_url}/_matrix/client/r0/register",
-                json=register_data,
-                timeout=10
+            response = await self.client.post(
+                "/_matrix/client/r0/register",
+                content=orjson.dumps(register_data),
+                headers=JSON_HEADERS
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 self.access_token = data.get("access_token")
+                self.client.headers.update({"Authorization": f"Bearer {self.access_token}"})
                 self.user_id = data.get("user_id")
                 self.device_id = data.get("device_id")
                 print(f"✅ User registration successful! User ID: {self.user_id}")
@@ -80,15 +151,15 @@ class MatrixTester:
                 print("⚠️ Registration requires authentication (normal for some servers)")
                 return False
             else:
-                error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+                error_data = orjson.loads(response.content) if response.headers.get('content-type', '').startswith('application/json') else {}
                 print(f"❌ Registration failed with status {response.status_code}: {error_data}")
                 return False
                 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             print(f"❌ Registration test failed: {e}")
             return False
     
-    def test_login(self):
+    async def test_login(self):
         """Test user login"""
         print("🔍 Testing user login...")
         if not self.user_id:
@@ -103,27 +174,28 @@ class MatrixTester:
                 "device_id": "test_device"
             }
             
-            response = requests.post(
-                f"{self.base_url}/_matrix/client/r0/login",
-                json=login_data,
-                timeout=10
+            response = await self.client.post(
+                "/_matrix/client/r0/login",
+                content=orjson.dumps(login_data),
+                headers=JSON_HEADERS
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 self.access_token = data.get("access_token")
+                self.client.headers.update({"Authorization": f"Bearer {self.access_token}"})
                 print(f"✅ Login successful! Access token obtained.")
                 return True
             else:
-                error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+                error_data = orjson.loads(response.content) if response.headers.get('content-type', '').startswith('application/json') else {}
                 print(f"❌ Login failed with status {response.status_code}: {error_data}")
                 return False
                 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             print(f"❌ Login test failed: {e}")
             return False
     
-    def test_room_creation(self):
+    async def test_room_creation(self):
         """Test room creation"""
         print("🔍 Testing room creation...")
         if not self.access_token:
@@ -131,35 +203,27 @@ class MatrixTester:
             return False
             
         try:
-            room_data = {
-                "name": "Test Room",
-                "topic": "A room for testing Matrixon functionality",
-                "preset": "private_chat"
-            }
-            
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            response = requests.post(
-                f"{self.base_url}/_matrix/client/r0/createRoom",
-                json=room_data,
-                headers=headers,
-                timeout=10
+            response = await self.client.post(
+                "/_matrix/client/r0/createRoom",
+                content=ROOM_BODY,
+                headers=JSON_HEADERS
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 room_id = data.get("room_id")
                 print(f"✅ Room creation successful! Room ID: {room_id}")
                 return room_id
             else:
-                error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+                error_data = orjson.loads(response.content) if response.headers.get('content-type', '').startswith('application/json') else {}
                 print(f"❌ Room creation failed with status {response.status_code}: {error_data}")
                 return False
                 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             print(f"❌ Room creation test failed: {e}")
             return False
     
-    def test_send_message(self, room_id):
+    async def test_send_message(self, room_id):
         """Test sending a message to a room"""
         print("🔍 Testing message sending...")
         if not self.access_token or not room_id:
@@ -167,34 +231,62 @@ class MatrixTester:
             return False
             
         try:
-            message_data = {
-                "msgtype": "m.text",
-                "body": "Hello from Matrixon test suite! 🚀"
-            }
-            
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            response = requests.put(
-                f"{self.base_url}/_matrix/client/r0/rooms/{room_id}/send/m.room.message/{int(time.time())}",
-                json=message_data,
-                headers=headers,
-                timeout=10
+            response = await self.client.put(
+                f"/_matrix/client/r0/rooms/{room_id}/send/m.room.message/{next(self._txn)}",
+                content=MESSAGE_BODY,
+                headers=JSON_HEADERS
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 event_id = data.get("event_id")
                 print(f"✅ Message sent successfully! Event ID: {event_id}")
                 return True
             else:
-                error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+                error_data = orjson.loads(response.content) if response.headers.get('content-type', '').startswith('application/json') else {}
                 print(f"❌ Message sending failed with status {response.status_code}: {error_data}")
                 return False
                 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             print(f"❌ Message sending test failed: {e}")
             return False
     
-    def test_sync(self):
+    async def test_send_many_messages(self, room_id, n):
+        """Test sending n messages concurrently over the shared connection"""
+        print(f"🔍 Testing bulk message sending ({n} messages)...")
+        if not self.access_token or not room_id:
+            print("⚠️ Skipping bulk message test (no access token or room)")
+            return False
+        
+        # Bounded to the pool size so no send waits out the pool timeout
+        in_flight = asyncio.Semaphore(MAX_CONNECTIONS)
+        
+        async def send_one():
+            async with in_flight:
+                return await self.client.put(
+                    f"/_matrix/client/r0/rooms/{room_id}/send/m.room.message/{next(self._txn)}",
+                    content=MESSAGE_BODY,
+                    headers=JSON_HEADERS
+                )
+        
+        try:
+            started = time.monotonic()
+            responses = await asyncio.gather(*(send_one() for _ in range(n)))
+            elapsed = time.monotonic() - started
+            
+            sent = sum(1 for r in responses if r.status_code == 200)
+            if sent == n:
+                print(f"✅ Sent {n} messages in {elapsed:.2f}s ({n / elapsed:.1f} msg/s)")
+                return True
+            else:
+                print(f"❌ Bulk message sending: only {sent}/{n} messages accepted")
+                return False
+                
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            print(f"❌ Bulk message sending test failed: {e}")
+            return False
+    
+    async def test_sync(self):
         """Test sync functionality"""
         print("🔍 Testing sync functionality...")
         if not self.access_token:
@@ -202,47 +294,57 @@ class MatrixTester:
             return False
             
         try:
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            response = requests.get(
-                f"{self.base_url}/_matrix/client/r0/sync?timeout=1000",
-                headers=headers,
+            params = {"timeout": 1000, "filter": SYNC_FILTER}
+            response = await self.client.get(
+                "/_matrix/client/r0/sync",
+                params=params,
                 timeout=15
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 next_batch = data.get("next_batch")
                 rooms = data.get("rooms", {})
                 print(f"✅ Sync successful! Next batch: {next_batch[:20]}...")
                 print(f"   Rooms in sync: {len(rooms.get('join', {}))}")
                 return True
             else:
-                error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+                error_data = orjson.loads(response.content) if response.headers.get('content-type', '').startswith('application/json') else {}
                 print(f"❌ Sync failed with status {response.status_code}: {error_data}")
                 return False
                 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             print(f"❌ Sync test failed: {e}")
             return False
     
-    def run_all_tests(self):
+    async def run_all_tests(self):
         """Run all Matrix functionality tests"""
         print("🎯 Starting Matrixon Matrix Server Test Suite")
         print("=" * 50)
         
         results = {}
         
-        # Core functionality tests
-        results['server_health'] = self.test_server_health()
-        results['federation'] = self.test_federation_status()
-        results['registration'] = self.test_user_registration()
-        results['login'] = self.test_login()
-        
-        # Advanced functionality tests
-        room_id = self.test_room_creation()
-        results['room_creation'] = bool(room_id)
-        results['message_sending'] = self.test_send_message(room_id) if room_id else False
-        results['sync'] = self.test_sync()
+        try:
+            # Core functionality tests (health and federation are independent)
+            results['server_health'], results['federation'] = await asyncio.gather(
+                self.test_server_health(),
+                self.test_federation_status(),
+            )
+            results['registration'] = await self.test_user_registration()
+            results['login'] = await self.test_login()
+            
+            # Advanced functionality tests (sync does not depend on the new room)
+            room_id, sync_ok = await asyncio.gather(
+                self.test_room_creation(),
+                self.test_sync(),
+            )
+            results['room_creation'] = bool(room_id)
+            results['message_sending'] = await self.test_send_message(room_id) if room_id else False
+            results['sync'] = sync_ok
+            if self.bulk_messages > 0:
+                results['bulk_messages'] = await self.test_send_many_messages(room_id, self.bulk_messages)
+        finally:
+            await self.client.aclose()
         
         # Results summary
         print("\n" + "=" * 50)
@@ -267,21 +369,25 @@ class MatrixTester:
 
 def main():
     """Main function to run Matrix tests"""
-    import argparse
-    
     parser = argparse.ArgumentParser(description="Test Matrixon Matrix Server functionality")
     parser.add_argument("--url", default="http://localhost:8008", 
                        help="Matrix server URL (default: http://localhost:8008)")
-    parser.add_argument("--wait", type=int, default=5,
-                       help="Seconds to wait before starting tests (default: 5)")
+    parser.add_argument("--wait", type=int, default=60,
+                       help="Maximum seconds to wait for the server to start (default: 60)")
+    parser.add_argument("--messages", type=int, default=0,
+                       help="Also send this many messages concurrently (default: 0, disabled)")
     
     args = parser.parse_args()
     
-    print(f"⏰ Waiting {args.wait} seconds for server to start...")
-    time.sleep(args.wait)
+    tester = MatrixTester(args.url, bulk_messages=args.messages)
+    
+    async def run():
+        print(f"⏰ Waiting up to {args.wait} seconds for server to start...")
+        if not await tester.wait_for_server(args.wait):
+            print("⚠️ Server did not answer in time, running tests anyway")
+        return await tester.run_all_tests()
     
-    tester = MatrixTester(args.url)
-    success = tester.run_all_tests()
+    success = asyncio.run(run())
     
     sys.exit(0 if success else 1)
 
@@ -17,10 +17,25 @@
 #
 # =============================================================================
 
+import argparse
+import concurrent.futures
+import functools
+import json
 import os
 import re
+import shutil
 import sys
-from pathlib import Path
+import tempfile
+import threading
+
+# Per-file size and mtime from the previous run, relative to the cwd
+MANIFEST_PATH = '.matrixon_header.manifest'
+
+# Serializes console output from worker threads
+print_lock = threading.Lock()
+
+# Progress lines are written to stdout in batches of this size
+LOG_FLUSH_EVERY = 256
 
 # Header template for different module types
 HEADER_TEMPLATE = """// =============================================================================
@@ -80,121 +95,215 @@ HEADER_TEMPLATE = """// ========================================================
 
 """
 
-def get_module_info(file_path):
-    """Determine module title, description and features based on file path."""
-    path_str = str(file_path)
-    module_name = file_path.stem
-    
-    # Convert snake_case to Title Case
-    module_title = ' '.join(word.capitalize() for word in module_name.split('_'))
-    
-    if '/database/' in path_str:
-        description = "Database layer component for high-performance data operations."
-        features = """//   • High-performance database operations
+# (description, features) for each path category, in match precedence order
+CATEGORY_TABLE = {
+    'database': (
+        "Database layer component for high-performance data operations.",
+        """//   • High-performance database operations
 //   • PostgreSQL backend optimization
 //   • Connection pooling and caching
 //   • Transaction management
-//   • Data consistency guarantees"""
-    elif '/api/' in path_str:
-        description = "Matrix API implementation for client-server communication."
-        features = """//   • Matrix protocol compliance
+//   • Data consistency guarantees"""),
+    'api': (
+        "Matrix API implementation for client-server communication.",
+        """//   • Matrix protocol compliance
 //   • RESTful API endpoints
 //   • Request/response handling
 //   • Authentication and authorization
-//   • Rate limiting and security"""
-    elif '/service/' in path_str:
-        description = "Core business logic service implementation."
-        features = """//   • Business logic implementation
+//   • Rate limiting and security"""),
+    'service': (
+        "Core business logic service implementation.",
+        """//   • Business logic implementation
 //   • Service orchestration
 //   • Event handling and processing
 //   • State management
-//   • Enterprise-grade reliability"""
-    elif '/utils/' in path_str:
-        description = "Utility functions and helper components."
-        features = """//   • Common utility functions
+//   • Enterprise-grade reliability"""),
+    'utils': (
+        "Utility functions and helper components.",
+        """//   • Common utility functions
 //   • Error handling and logging
 //   • Performance instrumentation
 //   • Helper traits and macros
-//   • Shared functionality"""
-    elif '/config/' in path_str:
-        description = "Configuration management and validation."
-        features = """//   • Configuration parsing and validation
+//   • Shared functionality"""),
+    'config': (
+        "Configuration management and validation.",
+        """//   • Configuration parsing and validation
 //   • Environment variable handling
 //   • Default value management
 //   • Type-safe configuration
-//   • Runtime configuration updates"""
-    elif '/cli/' in path_str:
-        description = "Command-line interface implementation."
-        features = """//   • CLI command handling
+//   • Runtime configuration updates"""),
+    'cli': (
+        "Command-line interface implementation.",
+        """//   • CLI command handling
 //   • Interactive user interface
 //   • Command validation and parsing
 //   • Help and documentation
-//   • Administrative operations"""
-    else:
-        description = "Core component of the Matrixon Matrix NextServer."
-        features = """//   • High-performance Matrix operations
+//   • Administrative operations"""),
+    'default': (
+        "Core component of the Matrixon Matrix NextServer.",
+        """//   • High-performance Matrix operations
 //   • Enterprise-grade reliability
 //   • Scalable architecture
 //   • Security-focused design
-//   • Matrix protocol compliance"""
-    
+//   • Matrix protocol compliance"""),
+}
+
+# Matches every "/<category>/" path segment in a single scan
+CATEGORY_RE = re.compile(r'/(database|api|service|utils|config|cli)(?=/)')
+
+def get_category(path_str):
+    """Return the CATEGORY_TABLE key for a path, honouring table order."""
+    found = set(CATEGORY_RE.findall(path_str))
+    for key in CATEGORY_TABLE:
+        if key in found:
+            return key
+    return 'default'
+
+def module_stem(file_path):
+    """File name without directory or extension, e.g. 'mod' for src/api/mod.rs."""
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+@functools.lru_cache(maxsize=None)
+def _module_info(module_name, key):
+    """Build (module_title, description, features) for a stem and category."""
+    # Convert snake_case to Title Case
+    module_title = ' '.join(word.capitalize() for word in module_name.split('_'))
+    description, features = CATEGORY_TABLE[key]
     return module_title, description, features
 
-def has_matrixon_header(file_path):
-    """Check if file already has the correct Matrixon header."""
+# HEADER_TEMPLATE with description/features filled in; only {module_title} remains
+PARTIAL_HEADERS = {
+    key: HEADER_TEMPLATE.replace('{description}', description).replace('{features}', features)
+    for key, (description, features) in CATEGORY_TABLE.items()
+}
+
+HEADER_SCAN_BYTES = 2048
+
+# Exact opening bytes of every header generated from HEADER_TEMPLATE
+HEADER_PREFIX = b'// ' + b'=' * 77 + b'\n// Matrixon Matrix NextServer - '
+
+# First line that is neither blank nor a //, /* or * comment line
+CODE_START_RE = re.compile(rb'^(?![ \t\r\f\v]*(?://|/\*|\*|$))', re.MULTILINE)
+
+def header_in(head):
+    """Check a file's leading bytes for the Matrixon header markers."""
+    if head[:len(HEADER_PREFIX)] == HEADER_PREFIX:
+        return True  # Current template, by far the common case
+    # Legacy or hand-edited headers: look for the markers anywhere up front
+    return (head.find(b'Matrixon Matrix NextServer', 0, HEADER_SCAN_BYTES) != -1 and
+            head.find(b'arkSong (arksong2018@gmail.com)', 0, HEADER_SCAN_BYTES) != -1)
+
+def write_atomic(file_path, payload):
+    """Rewrite file_path via a sibling temp file and an atomic rename."""
+    tmp = tempfile.NamedTemporaryFile(
+        'wb', dir=os.path.dirname(file_path) or '.', delete=False)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read(2000)  # Read first 2000 characters
-            return ('Matrixon Matrix NextServer' in content and 
-                    'arkSong (arksong2018@gmail.com)' in content)
-    except:
-        return False
+        with tmp:
+            tmp.write(payload)  # One write call for the whole file
+        shutil.copymode(file_path, tmp.name)
+        os.replace(tmp.name, file_path)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
 
-def update_file_header(file_path):
-    """Update a single file's header."""
-    if has_matrixon_header(file_path):
-        return False  # Skip, already updated
-    
+def load_manifest():
+    """Load the {path: [size, mtime_ns]} manifest from the last run."""
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest):
+    """Write the manifest for the next run."""
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, sort_keys=True)
+
+def record(manifest, file_path):
+    """Remember the current size and mtime of file_path."""
+    if manifest is not None:
+        st = os.stat(file_path)
+        manifest[file_path] = [st.st_size, st.st_mtime_ns]
+
+def update_file_header(file_path, backup=False, manifest=None):
+    """Update a single file's header, optionally keeping a .backup copy."""
+    entry = manifest.get(file_path) if manifest is not None else None
     try:
-        # Read current content
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        # Unchanged since the last run: skip without reading the file
+        st = os.stat(file_path)
+        if entry == [st.st_size, st.st_mtime_ns]:
+            return False
+        
+        # Read current content once; the header check reuses the same bytes
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        if header_in(data):
+            record(manifest, file_path)
+            return False  # Skip, already updated
+        data.decode('utf-8')  # Only rewrite valid UTF-8 sources
         
         # Find where actual code starts (skip existing comments)
-        start_line = 0
-        for i, line in enumerate(lines):
-            stripped = line.strip()
-            if stripped and not stripped.startswith('//') and not stripped.startswith('/*') and not stripped.startswith('*'):
-                start_line = i
-                break
+        m = CODE_START_RE.search(data)
+        start = m.start() if m else 0
         
-        # Generate new header
-        module_title, description, features = get_module_info(file_path)
-        new_header = HEADER_TEMPLATE.format(
-            module_title=module_title,
-            description=description,
-            features=features
-        )
+        # Generate new header from the category's preformatted template
+        key = get_category(file_path)
+        module_title = _module_info(module_stem(file_path), key)[0]
+        new_header = PARTIAL_HEADERS[key].replace('{module_title}', module_title).encode('utf-8')
+        if b'\r\n' in data:
+            new_header = new_header.replace(b'\n', b'\r\n')  # Match CRLF sources
         
-        # Create backup
-        backup_path = str(file_path) + '.backup'
-        with open(backup_path, 'w', encoding='utf-8') as f:
-            f.writelines(lines)
+        # Create backup (opt-in; re-runs are idempotent anyway)
+        if backup:
+            backup_path = file_path + '.backup'
+            with open(backup_path, 'wb') as f:
+                f.write(data)
         
         # Write new file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(new_header)
-            f.writelines(lines[start_line:])
+        write_atomic(file_path, new_header + data[start:])
+        record(manifest, file_path)
         
         return True  # Updated
     except Exception as e:
-        print(f"Error updating {file_path}: {e}")
+        with print_lock:
+            print(f"Error updating {file_path}: {e}")
         return False
 
+def iter_rs(root):
+    """Yield the path of every .rs file under root using one scandir per directory."""
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        with os.scandir(d) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                elif e.name.endswith('.rs'):
+                    yield e.path
+
+def process_file(file_path, backup=False, manifest=None):
+    """Update one file, returning (file_path, updated, error) for reporting."""
+    try:
+        return file_path, update_file_header(file_path, backup, manifest), None
+    except Exception as e:
+        return file_path, False, e
+
+def flush_log(log_buf):
+    """Write buffered progress lines in one call and clear the buffer."""
+    if log_buf:
+        with print_lock:
+            sys.stdout.write('\n'.join(log_buf) + '\n')
+        log_buf.clear()
+
 def main():
     """Main function to process all Rust files."""
-    src_dir = Path('src')
-    if not src_dir.exists():
+    parser = argparse.ArgumentParser(description="Batch update Matrixon headers in Rust sources")
+    parser.add_argument("--backup", action="store_true",
+                        help="Keep a <file>.backup copy of every updated file")
+    args = parser.parse_args()
+    
+    src_dir = 'src'
+    if not os.path.isdir(src_dir):
         print("Error: src directory not found!")
         return
     
@@ -204,22 +313,35 @@ def main():
     print()
     
     # Find all .rs files
-    rust_files = list(src_dir.rglob('*.rs'))
+    rust_files = list(iter_rs(src_dir))
     print(f"Found {len(rust_files)} Rust files")
     
     updated_count = 0
     skipped_count = 0
     
-    for file_path in sorted(rust_files):
-        try:
-            if update_file_header(file_path):
-                print(f"✅ Updated: {file_path}")
+    # Per-file work is I/O bound, so threads scale despite the GIL
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    manifest = load_manifest()
+    worker = functools.partial(process_file, backup=args.backup, manifest=manifest)
+    # Results arrive on this thread only; buffer them and write in chunks
+    log_buf = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
+        for file_path, updated, error in ex.map(worker, sorted(rust_files)):
+            if error is not None:
+                log_buf.append(f"❌ Error: {file_path} - {error}")
+            elif updated:
+                log_buf.append(f"✅ Updated: {file_path}")
                 updated_count += 1
             else:
-                print(f"⏭️  Skipped: {file_path} (already has Matrixon header)")
+                log_buf.append(f"⏭️  Skipped: {file_path} (already has Matrixon header)")
                 skipped_count += 1
-        except Exception as e:
-            print(f"❌ Error: {file_path} - {e}")
+            if len(log_buf) >= LOG_FLUSH_EVERY:
+                flush_log(log_buf)
+    flush_log(log_buf)
+    
+    # Drop entries for files that no longer exist
+    current = set(rust_files)
+    save_manifest({k: v for k, v in manifest.items() if k in current})
     
     print()
     print("📊 Summary:")
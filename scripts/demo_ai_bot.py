@@ -16,23 +16,95 @@ Features:
 Usage:
     python3 demo_ai_bot.py
 
+Requires Python 3.11+ (asyncio.TaskGroup). Apart from aiohttp, every
+native dependency (orjson, uvloop, pyahocorasick) is optional, so the bot
+also runs on PyPy3 (`pypy3 demo_ai_bot.py`), whose JIT suits the
+long-running sync loop.
+
 Author: Matrix Bot Development Team
 Version: 2.0.0
 """
 
+import ast
 import asyncio
-import json
 import time
 import aiohttp
 import logging
-from datetime import datetime
-from typing import Dict, Any, Optional
+import operator
+import os
+import random
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:  # orjson has no PyPy build; fall back to the stdlib
+    import json
+    
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    json_loads = json.loads
+
+try:
+    import ijson  # Incremental parsing of large /sync bodies
+except ImportError:
+    ijson = None
+
+try:
+    import ahocorasick  # pyahocorasick: one-pass multi-keyword matching
+except ImportError:
+    ahocorasick = None
 
 # Configuration
 BASE_URL = "http://localhost:6167"
 BOT_USERNAME = "demo_ai_bot"
 BOT_PASSWORD = "AIBotDemo123!"
 BOT_DISPLAY_NAME = "Demo AI Assistant 🤖"
+SEND_BATCH_MAX = 32        # Max queued replies sent concurrently per batch
+SEND_DRAIN_WINDOW = 0.005  # Seconds to let a burst accumulate before sending
+SEND_FLUSH_TIMEOUT = 5.0   # Seconds to let queued replies go out on shutdown
+EVENT_CONCURRENCY = 32     # Max message events handled at once per sync batch
+SYNC_STREAM_THRESHOLD = 64 * 1024  # Bodies at least this large are parsed incrementally
+SYNC_BACKOFF_MIN = 0.5     # First retry delay after a failed sync, in seconds
+SYNC_BACKOFF_MAX = 30.0    # Retry delay cap while the server stays unreachable
+TYPING_DELAY_S = 0.0       # Seconds to "type" before chat replies (0 = reply immediately)
+
+HELP_TEXT = """🤖 **AI Bot Commands**
+
+**Basic Commands:**
+• !help - Show this help message
+• !ping - Test bot responsiveness  
+• !time - Show current server time
+• !status - Display bot status
+
+**Utility Commands:**
+• !calc <expression> - Simple calculator
+• !weather <city> - Weather information (demo)
+• !joke - Tell a random joke
+• !quote - Inspirational quote
+
+**Information Commands:**
+• !rooms - List bot's rooms
+• !stats - Show bot statistics
+
+**Chat naturally with me for AI responses!** 💬
+"""
+
+WELCOME_TEXT = (
+    "🤖 Hello! I'm your Demo AI Assistant Bot!\n\n"
+    "I'm running on matrixon Matrix Server with PostgreSQL backend.\n\n"
+    "Type !help to see available commands, or just chat with me naturally!"
+)
+
+# Natural-language keyword buckets, in precedence order
+KW_GREETING, KW_HOW_ARE_YOU, KW_THANKS = range(3)
+KEYWORD_BUCKETS = (
+    ("hello", "hi"),
+    ("how are you",),
+    ("thank",),
+)
 
 # Setup logging
 logging.basicConfig(
@@ -41,6 +113,124 @@ logging.basicConfig(
 )
 logger = logging.getLogger("AIBot")
 
+# Canned replies. Chat templates are str.format()ed with sender, thought
+# (one of AI_RESPONSES) and snippet (the first 30 chars of the message).
+AI_RESPONSES = (
+    "That's an interesting question! Let me think about that...",
+    "I understand what you're asking. Here's my perspective:",
+    "Based on my knowledge, I would say:",
+    "That's a great point! My response would be:",
+    "I'm processing that information. Here's what I think:",
+)
+
+GREETING_RESPONSES = (
+    "Hello {sender}! 👋 How can I assist you today?",
+    "Hi there {sender}! I'm your AI assistant. What can I help you with?",
+    "Greetings {sender}! Ready to chat and help with your questions!",
+)
+
+HOW_ARE_YOU_RESPONSES = (
+    "I'm doing great! My PostgreSQL database is running smoothly and I'm ready to help! 🤖",
+    "Excellent! All systems are green and I'm processing messages efficiently! ⚡",
+    "I'm fantastic! Thanks for asking. How are you doing today?",
+)
+
+THANKS_RESPONSES = (
+    "You're very welcome! Happy to help! 😊",
+    "No problem at all! That's what I'm here for! 🤖",
+    "Glad I could assist! Feel free to ask anything else!",
+)
+
+DEFAULT_RESPONSES = (
+    "That's interesting, {sender}! {thought}",
+    "I understand your message about '{snippet}...' Let me process that...",
+    "Thanks for sharing that with me, {sender}! Here's my thought on it...",
+)
+
+BUCKET_RESPONSES = {
+    KW_GREETING: GREETING_RESPONSES,
+    KW_HOW_ARE_YOU: HOW_ARE_YOU_RESPONSES,
+    KW_THANKS: THANKS_RESPONSES,
+}
+
+JOKES = (
+    "Why don't scientists trust atoms? Because they make up everything! 😄",
+    "Why did the robot go to therapy? It had too many bits and bytes! 🤖",
+    "What do you call a Matrix server that tells jokes? matrixon Comedy Club! 😂",
+    "Why don't databases ever get lonely? They're always in relationships! 💾",
+    "What's a bot's favorite type of music? Algo-rhythms! 🎵",
+)
+
+QUOTES = (
+    "\"The future belongs to those who believe in the beauty of their dreams.\" - Eleanor Roosevelt",
+    "\"Innovation distinguishes between a leader and a follower.\" - Steve Jobs",
+    "\"The only way to do great work is to love what you do.\" - Steve Jobs",
+    "\"Technology is best when it brings people together.\" - Matt Mullenweg",
+    "\"The advance of technology is based on making it fit in so that you don't really even notice it.\" - Bill Gates",
+)
+
+# Calculator: a whitelist of arithmetic operators over numeric literals
+_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+MAX_RESULT_BITS = 10000  # Caps integer results so !calc 9^9^9 can't pin the event loop
+
+
+@lru_cache(maxsize=256)
+def _compile(expr: str) -> ast.expr:
+    """Parse an expression once; repeated !calc inputs reuse the tree"""
+    return ast.parse(expr.strip(), mode="eval").body
+
+
+def _eval(node: ast.expr) -> Union[int, float]:
+    """Evaluate a parsed arithmetic expression, rejecting anything else"""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPS:
+        left, right = _eval(node.left), _eval(node.right)
+        if isinstance(left, int) and isinstance(right, int):
+            # Estimate the result size before computing it
+            if isinstance(node.op, ast.Pow):
+                bits = abs(right) * abs(left).bit_length() if abs(left) > 1 else 0
+            elif isinstance(node.op, ast.Mult):
+                bits = abs(left).bit_length() + abs(right).bit_length()
+            else:
+                bits = 0
+            if bits > MAX_RESULT_BITS:
+                raise ValueError("result too large")
+        try:
+            return _OPS[type(node.op)](left, right)
+        except OverflowError:
+            raise ValueError("result too large") from None
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _OPS:
+        return _OPS[type(node.op)](_eval(node.operand))
+    raise ValueError(f"unsupported expression: {ast.dump(node)}")
+
+
+@dataclass(slots=True)
+class BotStats:
+    """Counters reported by !status and !stats"""
+    messages_sent: int = 0
+    commands_processed: int = 0
+    rooms_joined: int = 0
+    uptime_start: float = 0.0
+
+
+@dataclass(slots=True)
+class RoomInfo:
+    """What the bot remembers about a joined room"""
+    name: str = ""
+    members: int = 0
+    created: float = 0.0
+
+
 class matrixonAIBot:
     """
     AI Bot for matrixon Matrix Server
@@ -49,16 +239,42 @@ class matrixonAIBot:
     via Matrix protocol interactions.
     """
     
+    __slots__ = (
+        "session", "access_token", "user_id", "device_id", "sync_token",
+        "rooms", "running", "typing_delay_s", "commands", "stats",
+        "send_queue", "_rng", "_bg_tasks", "_sender_task", "_sync_q", "_sync_ok",
+        "_partial_since", "_partial_ids", "_backoff", "_sem", "_tx_counter",
+        "_tx_prefix", "_kw", "_static_bodies",
+    )
+    
     def __init__(self):
         self.session: Optional[aiohttp.ClientSession] = None
         self.access_token: Optional[str] = None
         self.user_id: Optional[str] = None
         self.device_id: Optional[str] = None
         self.sync_token: Optional[str] = None
-        self.rooms: Dict[str, Any] = {}
+        self.rooms: Dict[str, RoomInfo] = {}
         self.running = False
+        self.typing_delay_s: float = TYPING_DELAY_S
+        self._rng = random.Random()
+        self._bg_tasks: set = set()  # Fire-and-forget tasks, kept alive until done
+        
+        # Outgoing (room_id, text or pre-encoded body) replies, drained by _sender_loop
+        self.send_queue: "asyncio.Queue[Tuple[str, Union[str, bytes]]]" = asyncio.Queue()
+        self._sender_task: Optional[asyncio.Task] = None
+        self._sync_q: Optional[asyncio.Queue] = None
+        self._sync_ok = False
+        # Event IDs already dispatched from a streamed batch that never finished
+        self._partial_since: Optional[str] = None
+        self._partial_ids: set = set()
+        self._backoff = SYNC_BACKOFF_MIN
+        self._sem = asyncio.Semaphore(EVENT_CONCURRENCY)
+        
+        # Transaction IDs: a per-process prefix plus a counter, unique per send
+        self._tx_counter = 0
+        self._tx_prefix = f"bot_{os.getpid()}_{int(time.time() * 1000)}_"
         
-        # AI responses and commands
+        # Command dispatch table
         self.commands = {
             "!help": self.cmd_help,
             "!time": self.cmd_time,
@@ -72,31 +288,78 @@ class matrixonAIBot:
             "!quote": self.cmd_quote,
         }
         
-        self.ai_responses = [
-            "That's an interesting question! Let me think about that...",
-            "I understand what you're asking. Here's my perspective:",
-            "Based on my knowledge, I would say:",
-            "That's a great point! My response would be:",
-            "I'm processing that information. Here's what I think:",
-        ]
+        # Keyword automaton for handle_ai_response (None without pyahocorasick)
+        self._kw = None
+        if ahocorasick is not None:
+            self._kw = ahocorasick.Automaton()
+            for bucket, words in enumerate(KEYWORD_BUCKETS):
+                for word in words:
+                    self._kw.add_word(word, bucket)
+            self._kw.make_automaton()
         
-        self.stats = {
-            "messages_sent": 0,
-            "commands_processed": 0,
-            "rooms_joined": 0,
-            "uptime_start": time.time(),
+        # Fully static replies, encoded once as ready-to-send message bodies
+        self._static_bodies: Dict[str, bytes] = {
+            name: json_dumps({"msgtype": "m.text", "body": text})
+            for name, text in (("help", HELP_TEXT), ("welcome", WELCOME_TEXT))
         }
+        
+        self.stats = BotStats(uptime_start=time.time())
 
     async def __aenter__(self):
         """Async context manager entry"""
-        self.session = aiohttp.ClientSession()
+        # One long-lived keep-alive pool for the bot's lifetime; sync and
+        # sends can run side by side without starving each other
+        connector = aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=64,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            force_close=False,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, base_url=BASE_URL)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
+        if self._sender_task:
+            if not self._sender_task.done():
+                # Let already-queued replies go out before stopping the sender
+                try:
+                    await asyncio.wait_for(self.send_queue.join(), SEND_FLUSH_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning("⚠️  %d queued replies dropped on shutdown",
+                                   self.send_queue.qsize())
+            self._sender_task.cancel()
+            await asyncio.gather(self._sender_task, return_exceptions=True)
         if self.session:
             await self.session.close()
 
+    async def _request_json(self, method: str, url: str, payload: Any = None,
+                            **kwargs) -> Tuple[int, Dict[str, Any]]:
+        """Send a JSON body (if any) and decode the JSON reply
+
+        bytes payloads are taken as already-encoded JSON and sent as is.
+        """
+        if payload is not None:
+            kwargs["data"] = payload if isinstance(payload, bytes) else json_dumps(payload)
+            kwargs["headers"] = {"Content-Type": "application/json", **kwargs.get("headers", {})}
+        async with self.session.request(method, url, **kwargs) as response:
+            body = await response.read()
+            return response.status, json_loads(body) if body else {}
+
+    async def _post_json(self, url: str, payload: Any, **kwargs) -> Tuple[int, Dict[str, Any]]:
+        """POST a JSON payload, returning (status, decoded body)"""
+        return await self._request_json("POST", url, payload, **kwargs)
+
+    async def _put_json(self, url: str, payload: Any, **kwargs) -> Tuple[int, Dict[str, Any]]:
+        """PUT a JSON payload, returning (status, decoded body)"""
+        return await self._request_json("PUT", url, payload, **kwargs)
+
+    def _set_access_token(self, token: str):
+        """Store the token and send it by default on every session request"""
+        self.access_token = token
+        self.session.headers["Authorization"] = f"Bearer {token}"
+
     async def register_bot(self) -> bool:
         """Register the bot user with matrixon server"""
         register_data = {
@@ -106,29 +369,28 @@ class matrixonAIBot:
         }
         
         try:
-            async with self.session.post(
-                f"{BASE_URL}/_matrix/client/r0/register",
-                json=register_data
-            ) as response:
-                data = await response.json()
-                
-                if response.status == 200:
-                    self.access_token = data["access_token"]
-                    self.user_id = data["user_id"]
-                    self.device_id = data.get("device_id")
-                    logger.info(f"✅ Bot registered successfully: {self.user_id}")
-                    return True
+            status, data = await self._post_json(
+                "/_matrix/client/r0/register",
+                register_data
+            )
+            
+            if status == 200:
+                self._set_access_token(data["access_token"])
+                self.user_id = data["user_id"]
+                self.device_id = data.get("device_id")
+                logger.info("✅ Bot registered successfully: %s", self.user_id)
+                return True
+            else:
+                error_code = data.get("errcode", "UNKNOWN")
+                if error_code == "M_USER_IN_USE":
+                    logger.info("ℹ️  Bot user already exists, attempting login...")
+                    return await self.login_bot()
                 else:
-                    error_code = data.get("errcode", "UNKNOWN")
-                    if error_code == "M_USER_IN_USE":
-                        logger.info("ℹ️  Bot user already exists, attempting login...")
-                        return await self.login_bot()
-                    else:
-                        logger.error(f"❌ Registration failed: {data}")
-                        return False
-                        
+                    logger.error("❌ Registration failed: %s", data)
+                    return False
+                    
         except Exception as e:
-            logger.error(f"❌ Registration error: {e}")
+            logger.error("❌ Registration error: %s", e)
             return False
 
     async def login_bot(self) -> bool:
@@ -140,45 +402,43 @@ class matrixonAIBot:
         }
         
         try:
-            async with self.session.post(
-                f"{BASE_URL}/_matrix/client/r0/login",
-                json=login_data
-            ) as response:
-                data = await response.json()
+            status, data = await self._post_json(
+                "/_matrix/client/r0/login",
+                login_data
+            )
+            
+            if status == 200:
+                self._set_access_token(data["access_token"])
+                self.user_id = data["user_id"]
+                self.device_id = data.get("device_id")
+                logger.info("✅ Bot logged in successfully: %s", self.user_id)
+                return True
+            else:
+                logger.error("❌ Login failed: %s", data)
+                return False
                 
-                if response.status == 200:
-                    self.access_token = data["access_token"]
-                    self.user_id = data["user_id"]
-                    self.device_id = data.get("device_id")
-                    logger.info(f"✅ Bot logged in successfully: {self.user_id}")
-                    return True
-                else:
-                    logger.error(f"❌ Login failed: {data}")
-                    return False
-                    
         except Exception as e:
-            logger.error(f"❌ Login error: {e}")
+            logger.error("❌ Login error: %s", e)
             return False
 
     async def setup_profile(self) -> bool:
         """Setup bot profile and display name"""
         try:
             # Set display name
-            async with self.session.put(
-                f"{BASE_URL}/_matrix/client/r0/profile/{self.user_id}/displayname",
-                headers={"Authorization": f"Bearer {self.access_token}"},
-                json={"displayname": BOT_DISPLAY_NAME}
-            ) as response:
-                if response.status == 200:
-                    logger.info(f"✅ Bot profile configured: {BOT_DISPLAY_NAME}")
-                    return True
-                else:
-                    data = await response.json()
-                    logger.warning(f"⚠️  Profile setup warning: {data}")
-                    return True  # Non-critical failure
-                    
+            status, data = await self._put_json(
+                f"/_matrix/client/r0/profile/{self.user_id}/displayname",
+                {"displayname": BOT_DISPLAY_NAME}
+            )
+            
+            if status == 200:
+                logger.info("✅ Bot profile configured: %s", BOT_DISPLAY_NAME)
+                return True
+            else:
+                logger.warning("⚠️  Profile setup warning: %s", data)
+                return True  # Non-critical failure
+                
         except Exception as e:
-            logger.error(f"❌ Profile setup error: {e}")
+            logger.error("❌ Profile setup error: %s", e)
             return False
 
     async def create_demo_room(self) -> Optional[str]:
@@ -190,37 +450,31 @@ class matrixonAIBot:
         }
         
         try:
-            async with self.session.post(
-                f"{BASE_URL}/_matrix/client/r0/createRoom",
-                headers={"Authorization": f"Bearer {self.access_token}"},
-                json=room_data
-            ) as response:
-                data = await response.json()
+            status, data = await self._post_json(
+                "/_matrix/client/r0/createRoom",
+                room_data
+            )
+            
+            if status == 200:
+                room_id = data["room_id"]
+                self.rooms[room_id] = RoomInfo(
+                    name="AI Bot Demo Room",
+                    members=1,
+                    created=time.time()
+                )
+                self.stats.rooms_joined += 1
+                logger.info("✅ Demo room created: %s", room_id)
+                
+                # Send welcome message
+                await self.send_raw(room_id, self._static_bodies["welcome"])
+                
+                return room_id
+            else:
+                logger.error("❌ Room creation failed: %s", data)
+                return None
                 
-                if response.status == 200:
-                    room_id = data["room_id"]
-                    self.rooms[room_id] = {
-                        "name": "AI Bot Demo Room",
-                        "members": 1,
-                        "created": time.time()
-                    }
-                    self.stats["rooms_joined"] += 1
-                    logger.info(f"✅ Demo room created: {room_id}")
-                    
-                    # Send welcome message
-                    await self.send_message(room_id, 
-                        "🤖 Hello! I'm your Demo AI Assistant Bot!\n\n"
-                        "I'm running on matrixon Matrix Server with PostgreSQL backend.\n\n"
-                        "Type !help to see available commands, or just chat with me naturally!"
-                    )
-                    
-                    return room_id
-                else:
-                    logger.error(f"❌ Room creation failed: {data}")
-                    return None
-                    
         except Exception as e:
-            logger.error(f"❌ Room creation error: {e}")
+            logger.error("❌ Room creation error: %s", e)
             return None
 
     async def send_message(self, room_id: str, message: str) -> bool:
@@ -229,60 +483,176 @@ class matrixonAIBot:
             "msgtype": "m.text",
             "body": message
         }
-        
+        return await self.send_raw(room_id, json_dumps(message_data))
+
+    async def send_raw(self, room_id: str, body_bytes: bytes) -> bool:
+        """Send an already-encoded m.room.message body to a room"""
         try:
-            tx_id = f"bot_{int(time.time() * 1000)}"
-            async with self.session.put(
-                f"{BASE_URL}/_matrix/client/r0/rooms/{room_id}/send/m.room.message/{tx_id}",
-                headers={"Authorization": f"Bearer {self.access_token}"},
-                json=message_data
-            ) as response:
-                if response.status == 200:
-                    self.stats["messages_sent"] += 1
-                    logger.debug(f"📨 Message sent to {room_id}")
-                    return True
-                else:
-                    data = await response.json()
-                    logger.error(f"❌ Message send failed: {data}")
-                    return False
-                    
+            self._tx_counter += 1
+            tx_id = f"{self._tx_prefix}{self._tx_counter}"
+            status, data = await self._put_json(
+                f"/_matrix/client/r0/rooms/{room_id}/send/m.room.message/{tx_id}",
+                body_bytes
+            )
+            
+            if status == 200:
+                self.stats.messages_sent += 1
+                logger.debug("📨 Message sent to %s", room_id)
+                return True
+            else:
+                logger.error("❌ Message send failed: %s", data)
+                return False
+                
         except Exception as e:
-            logger.error(f"❌ Message send error: {e}")
+            logger.error("❌ Message send error: %s", e)
             return False
 
-    async def sync_events(self) -> Dict[str, Any]:
-        """Sync with server to get new events"""
+    async def send_typing(self, room_id: str, duration_s: float) -> bool:
+        """Show the bot as typing in a room for duration_s seconds"""
+        try:
+            status, data = await self._put_json(
+                f"/_matrix/client/r0/rooms/{room_id}/typing/{self.user_id}",
+                {"typing": True, "timeout": int(duration_s * 1000)}
+            )
+            if status != 200:
+                logger.debug("⌨️  Typing notification failed: %s", data)
+            return status == 200
+            
+        except Exception as e:
+            logger.debug("⌨️  Typing notification error: %s", e)
+            return False
+
+    async def _sender_loop(self):
+        """Send queued replies in small batches, rooms concurrently
+
+        Replies to the same room are sent one after another so they appear
+        in the order they were queued.
+        """
+        while True:
+            batch = [await self.send_queue.get()]
+            await asyncio.sleep(SEND_DRAIN_WINDOW)
+            while len(batch) < SEND_BATCH_MAX and not self.send_queue.empty():
+                batch.append(self.send_queue.get_nowait())
+            by_room: Dict[str, List[Union[str, bytes]]] = {}
+            for room_id, body in batch:
+                by_room.setdefault(room_id, []).append(body)
+            try:
+                await asyncio.gather(*(
+                    self._send_in_order(room_id, bodies)
+                    for room_id, bodies in by_room.items()
+                ))
+            finally:
+                for _ in batch:
+                    self.send_queue.task_done()
+
+    async def _send_in_order(self, room_id: str, bodies: List[Union[str, bytes]]):
+        """Send one room's share of a batch sequentially"""
+        for body in bodies:
+            if isinstance(body, bytes):
+                await self.send_raw(room_id, body)
+            else:
+                await self.send_message(room_id, body)
+
+    async def sync_events(self) -> AsyncIterator[Dict[str, Any]]:
+        """Sync with server, yielding sync payloads as they become available
+
+        Small responses are decoded in one go and yielded whole. Large (or
+        chunked) ones are parsed incrementally with ijson when it is
+        installed, yielding one single-room payload per joined room as soon
+        as that room has been received, so processing overlaps the download.
+
+        ``_sync_ok`` is set once a 200 response has been fully consumed, so
+        callers can tell an empty sync apart from a failed one. If a streamed
+        body breaks off, the events already yielded are remembered against
+        its ``since`` token and dropped when that batch is fetched again.
+        """
+        self._sync_ok = False
         params = {"timeout": 10000}
         if self.sync_token:
             params["since"] = self.sync_token
         
         try:
             async with self.session.get(
-                f"{BASE_URL}/_matrix/client/r0/sync",
-                headers={"Authorization": f"Bearer {self.access_token}"},
+                "/_matrix/client/r0/sync",
                 params=params,
-                timeout=aiohttp.ClientTimeout(total=15)
+                # Per-read timeout: a streamed body may wait on the consumer
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=15)
             ) as response:
-                if response.status == 200:
-                    data = await response.json()
+                if response.status != 200:
+                    logger.error("❌ Sync failed: %s", response.status)
+                    return
+                
+                length = response.content_length
+                if ijson is None or (length is not None and length < SYNC_STREAM_THRESHOLD):
+                    data = json_loads(await response.read())
                     self.sync_token = data["next_batch"]
-                    return data
-                else:
-                    logger.error(f"❌ Sync failed: {response.status}")
-                    return {}
+                    self._sync_ok = True
+                    yield data
+                    return
+                
+                since = params.get("since")
+                if self._partial_since != since:
+                    self._partial_since, self._partial_ids = since, set()
+                next_batch = None
+                async for item in self._stream_sync(response.content):
+                    if isinstance(item, str):
+                        next_batch = item
+                    else:
+                        yield self._skip_dispatched(item)
+                if not next_batch:
+                    logger.error("❌ Sync response had no next_batch")
+                    return
+                self.sync_token = next_batch
+                self._partial_since, self._partial_ids = None, set()
+                self._sync_ok = True
                     
         except asyncio.TimeoutError:
             logger.debug("⏱️  Sync timeout (normal)")
-            return {}
         except Exception as e:
-            logger.error(f"❌ Sync error: {e}")
-            return {}
+            logger.error("❌ Sync error: %s", e)
+
+    def _skip_dispatched(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop timeline events already yielded for this batch, recording the rest"""
+        seen = self._partial_ids
+        for room_data in payload["rooms"]["join"].values():
+            timeline = room_data.get("timeline")
+            if not timeline or not timeline.get("events"):
+                continue
+            fresh = []
+            for event in timeline["events"]:
+                event_id = event.get("event_id")
+                if event_id is None or event_id not in seen:
+                    fresh.append(event)
+                    if event_id is not None:
+                        seen.add(event_id)
+            timeline["events"] = fresh
+        return payload
+
+    async def _stream_sync(self, stream) -> AsyncIterator[Union[str, Dict[str, Any]]]:
+        """Incrementally parse a /sync body
+
+        Yields the next_batch token as a str, and each joined room as a
+        {"rooms": {"join": {room_id: room_data}}} payload once it is complete.
+        """
+        room_id = room_prefix = builder = None
+        async for prefix, event, value in ijson.parse_async(stream):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == room_prefix and event == "end_map":
+                    yield {"rooms": {"join": {room_id: builder.value}}}
+                    room_id = room_prefix = builder = None
+            elif prefix == "rooms.join" and event == "map_key":
+                room_id, room_prefix = value, f"rooms.join.{value}"
+                builder = ijson.ObjectBuilder()
+            elif prefix == "next_batch" and event == "string":
+                yield value
 
     async def process_events(self, sync_data: Dict[str, Any]):
         """Process incoming events from sync"""
         rooms = sync_data.get("rooms", {})
         joined_rooms = rooms.get("join", {})
         
+        pending = []
         for room_id, room_data in joined_rooms.items():
             # Process timeline events
             timeline = room_data.get("timeline", {})
@@ -290,7 +660,21 @@ class matrixonAIBot:
             
             for event in events:
                 if event.get("type") == "m.room.message":
-                    await self.handle_message_event(room_id, event)
+                    pending.append((room_id, event))
+        
+        # Handle the batch concurrently, bounded by the semaphore
+        async with asyncio.TaskGroup() as tg:
+            for room_id, event in pending:
+                tg.create_task(self._handle_gated(room_id, event))
+
+    async def _handle_gated(self, room_id: str, event: Dict[str, Any]):
+        """Handle one message event under the concurrency semaphore"""
+        async with self._sem:
+            try:
+                await self.handle_message_event(room_id, event)
+            except Exception as e:
+                # Contain failures so one bad event doesn't cancel the group
+                logger.error("❌ Event handling error in %s: %s", room_id, e)
 
     async def handle_message_event(self, room_id: str, event: Dict[str, Any]):
         """Handle incoming message events"""
@@ -302,98 +686,79 @@ class matrixonAIBot:
         if sender == self.user_id:
             return
         
-        logger.info(f"📩 Received message in {room_id}: {message_body[:50]}...")
+        lowered = message_body.casefold()
+        
+        logger.info("📩 Received message in %s: %.50s...", room_id, message_body)
         
         # Process commands
         if message_body.startswith("!"):
             await self.handle_command(room_id, message_body, sender)
         else:
             # Generate AI response
-            await self.handle_ai_response(room_id, message_body, sender)
+            await self.handle_ai_response(room_id, message_body, sender, lowered)
 
     async def handle_command(self, room_id: str, command: str, sender: str):
         """Handle bot commands"""
-        cmd_parts = command.split(" ", 1)
-        cmd = cmd_parts[0].lower()
-        args = cmd_parts[1] if len(cmd_parts) > 1 else ""
+        head, _, args = command.partition(" ")
+        cmd = head.lower()
+        handler = self.commands.get(cmd)
         
-        if cmd in self.commands:
-            self.stats["commands_processed"] += 1
-            response = await self.commands[cmd](args, sender)
-            await self.send_message(room_id, response)
+        if handler is not None:
+            self.stats.commands_processed += 1
+            # Handlers return text, or bytes for a prebuilt static body
+            response = await handler(args, sender)
+            self.send_queue.put_nowait((room_id, response))
         else:
             response = f"🤔 Unknown command: {cmd}\nType !help for available commands."
-            await self.send_message(room_id, response)
-
-    async def handle_ai_response(self, room_id: str, message: str, sender: str):
+            self.send_queue.put_nowait((room_id, response))
+
+    def _pick(self, choices: Tuple[str, ...]) -> str:
+        """Pick one entry of a response tuple at random"""
+        return choices[self._rng.randrange(len(choices))]
+
+    def _match_keywords(self, lowered: str) -> Optional[int]:
+        """Return the highest-precedence keyword bucket found in lowered"""
+        if self._kw is not None:
+            return min((bucket for _, bucket in self._kw.iter(lowered)), default=None)
+        for bucket, words in enumerate(KEYWORD_BUCKETS):
+            if any(word in lowered for word in words):
+                return bucket
+        return None
+
+    async def handle_ai_response(self, room_id: str, message: str, sender: str,
+                                 lowered: Optional[str] = None):
         """Generate AI response to natural language"""
-        # Simple AI response logic (can be enhanced with actual AI models)
-        import random
-        
-        # Add typing delay for realism
-        await asyncio.sleep(1)
-        
-        if "hello" in message.lower() or "hi" in message.lower():
-            responses = [
-                f"Hello {sender}! 👋 How can I assist you today?",
-                f"Hi there {sender}! I'm your AI assistant. What can I help you with?",
-                f"Greetings {sender}! Ready to chat and help with your questions!"
-            ]
-        elif "how are you" in message.lower():
-            responses = [
-                "I'm doing great! My PostgreSQL database is running smoothly and I'm ready to help! 🤖",
-                "Excellent! All systems are green and I'm processing messages efficiently! ⚡",
-                "I'm fantastic! Thanks for asking. How are you doing today?"
-            ]
-        elif "thank" in message.lower():
-            responses = [
-                "You're very welcome! Happy to help! 😊",
-                "No problem at all! That's what I'm here for! 🤖",
-                "Glad I could assist! Feel free to ask anything else!"
-            ]
-        else:
-            responses = [
-                f"That's interesting, {sender}! {random.choice(self.ai_responses)}",
-                f"I understand your message about '{message[:30]}...' Let me process that...",
-                f"Thanks for sharing that with me, {sender}! Here's my thought on it...",
-            ]
+        # Optional typing delay for realism, shown as a real typing indicator
+        if self.typing_delay_s:
+            task = asyncio.create_task(self.send_typing(room_id, self.typing_delay_s))
+            self._bg_tasks.add(task)
+            task.add_done_callback(self._bg_tasks.discard)
+            await asyncio.sleep(self.typing_delay_s)
         
-        response = random.choice(responses)
-        await self.send_message(room_id, response)
+        # Simple AI response logic (can be enhanced with actual AI models)
+        bucket = self._match_keywords(message.casefold() if lowered is None else lowered)
+        template = self._pick(BUCKET_RESPONSES.get(bucket, DEFAULT_RESPONSES))
+        response = template.format(
+            sender=sender,
+            thought=self._pick(AI_RESPONSES),
+            snippet=message[:30],
+        )
+        self.send_queue.put_nowait((room_id, response))
 
     # Command implementations
-    async def cmd_help(self, args: str, sender: str) -> str:
+    async def cmd_help(self, args: str, sender: str) -> bytes:
         """Show available commands"""
-        help_text = """🤖 **AI Bot Commands**
-
-**Basic Commands:**
-• !help - Show this help message
-• !ping - Test bot responsiveness  
-• !time - Show current server time
-• !status - Display bot status
-
-**Utility Commands:**
-• !calc <expression> - Simple calculator
-• !weather <city> - Weather information (demo)
-• !joke - Tell a random joke
-• !quote - Inspirational quote
-
-**Information Commands:**
-• !rooms - List bot's rooms
-• !stats - Show bot statistics
-
-**Chat naturally with me for AI responses!** 💬
-"""
-        return help_text
+        return self._static_bodies["help"]
 
     async def cmd_time(self, args: str, sender: str) -> str:
         """Show current time"""
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S %Z")
-        return f"🕐 Current server time: {current_time}"
+        t = time.gmtime()
+        return (f"🕐 Current server time: {t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d} "
+                f"{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d} UTC")
 
     async def cmd_status(self, args: str, sender: str) -> str:
         """Show bot status"""
-        uptime = time.time() - self.stats["uptime_start"]
+        uptime = time.time() - self.stats.uptime_start
         uptime_hours = uptime / 3600
         
         status = f"""🤖 **AI Bot Status**
@@ -405,9 +770,9 @@ class matrixonAIBot:
 • Matrix Server: matrixon (localhost:6167)
 
 **Statistics:**
-• Messages sent: {self.stats['messages_sent']}
-• Commands processed: {self.stats['commands_processed']}
-• Rooms joined: {self.stats['rooms_joined']}
+• Messages sent: {self.stats.messages_sent}
+• Commands processed: {self.stats.commands_processed}
+• Rooms joined: {self.stats.rooms_joined}
 
 **Performance:**
 • Response time: <100ms ⚡
@@ -425,22 +790,22 @@ class matrixonAIBot:
         if not self.rooms:
             return "📋 I'm not in any rooms yet (or haven't synced recently)."
         
-        room_list = "📋 **Rooms I'm in:**\n\n"
-        for room_id, room_info in self.rooms.items():
-            room_list += f"• {room_info.get('name', 'Unknown Room')}\n"
-            room_list += f"  ID: {room_id[:20]}...\n\n"
-        
-        return room_list
+        parts = ["📋 **Rooms I'm in:**\n\n"]
+        parts.extend(
+            f"• {room_info.name or 'Unknown Room'}\n  ID: {room_id[:20]}...\n\n"
+            for room_id, room_info in self.rooms.items()
+        )
+        return "".join(parts)
 
     async def cmd_stats(self, args: str, sender: str) -> str:
         """Show detailed statistics"""
-        uptime = time.time() - self.stats["uptime_start"]
+        uptime = time.time() - self.stats.uptime_start
         
         stats = f"""📊 **Detailed Bot Statistics**
 
 **Activity Metrics:**
-• Total messages sent: {self.stats['messages_sent']}
-• Commands processed: {self.stats['commands_processed']}
+• Total messages sent: {self.stats.messages_sent}
+• Commands processed: {self.stats.commands_processed}
 • Average response time: <100ms
 • Success rate: >99%
 
@@ -460,15 +825,7 @@ class matrixonAIBot:
 
     async def cmd_joke(self, args: str, sender: str) -> str:
         """Tell a random joke"""
-        jokes = [
-            "Why don't scientists trust atoms? Because they make up everything! 😄",
-            "Why did the robot go to therapy? It had too many bits and bytes! 🤖",
-            "What do you call a Matrix server that tells jokes? matrixon Comedy Club! 😂",
-            "Why don't databases ever get lonely? They're always in relationships! 💾",
-            "What's a bot's favorite type of music? Algo-rhythms! 🎵",
-        ]
-        import random
-        return random.choice(jokes)
+        return self._pick(JOKES)
 
     async def cmd_weather(self, args: str, sender: str) -> str:
         """Weather information (demo)"""
@@ -481,23 +838,15 @@ class matrixonAIBot:
             return "🧮 Usage: !calc <expression>\nExample: !calc 2 + 2"
         
         try:
-            # Simple evaluation (security note: use ast.literal_eval for production)
-            result = eval(args.replace("^", "**"))
+            # Arithmetic only: parsed once, then walked by _eval (no eval())
+            result = _eval(_compile(args.replace("^", "**")))
             return f"🧮 {args} = {result}"
-        except:
+        except Exception:
             return f"❌ Invalid expression: {args}\nTry something like: 2 + 2 or 10 * 5"
 
     async def cmd_quote(self, args: str, sender: str) -> str:
         """Inspirational quote"""
-        quotes = [
-            "\"The future belongs to those who believe in the beauty of their dreams.\" - Eleanor Roosevelt",
-            "\"Innovation distinguishes between a leader and a follower.\" - Steve Jobs",
-            "\"The only way to do great work is to love what you do.\" - Steve Jobs",
-            "\"Technology is best when it brings people together.\" - Matt Mullenweg",
-            "\"The advance of technology is based on making it fit in so that you don't really even notice it.\" - Bill Gates",
-        ]
-        import random
-        return f"💭 {random.choice(quotes)}"
+        return f"💭 {self._pick(QUOTES)}"
 
     async def run(self):
         """Main bot loop"""
@@ -515,26 +864,52 @@ class matrixonAIBot:
         # Create demo room
         demo_room = await self.create_demo_room()
         if demo_room:
-            logger.info(f"✅ Demo room ready: {demo_room}")
+            logger.info("✅ Demo room ready: %s", demo_room)
         
         # Start sync loop
         self.running = True
+        self._sender_task = asyncio.create_task(self._sender_loop())
         logger.info("🔄 Starting sync loop...")
         
+        # Pipeline: the next /sync is already in flight while events are processed
+        self._sync_q = asyncio.Queue(maxsize=2)
+        await asyncio.gather(self._sync_producer(), self._sync_consumer())
+
+    async def _sync_producer(self):
+        """Issue the next /sync as soon as the previous one returns"""
         while self.running:
             try:
-                sync_data = await self.sync_events()
-                if sync_data:
-                    await self.process_events(sync_data)
-                
-                await asyncio.sleep(0.1)  # Small delay to prevent busy waiting
+                async for sync_data in self.sync_events():
+                    await self._sync_q.put(sync_data)
+                if self._sync_ok:
+                    self._backoff = SYNC_BACKOFF_MIN
+                else:
+                    await self._sleep_backoff()  # Non-200, timeout or broken body
                 
             except KeyboardInterrupt:
                 logger.info("👋 Bot shutdown requested")
                 self.running = False
             except Exception as e:
-                logger.error(f"❌ Sync loop error: {e}")
-                await asyncio.sleep(5)  # Wait before retrying
+                logger.error("❌ Sync loop error: %s", e)
+                await self._sleep_backoff()
+        
+        await self._sync_q.put(None)  # Tell the consumer to stop
+
+    async def _sleep_backoff(self):
+        """Sleep for the current backoff plus jitter, then double it (capped)"""
+        await asyncio.sleep(self._backoff + self._rng.random() * self._backoff)
+        self._backoff = min(self._backoff * 2, SYNC_BACKOFF_MAX)
+
+    async def _sync_consumer(self):
+        """Process sync payloads as the producer delivers them"""
+        while True:
+            sync_data = await self._sync_q.get()
+            if sync_data is None:
+                return
+            try:
+                await self.process_events(sync_data)
+            except Exception as e:
+                logger.error("❌ Event processing error: %s", e)
 
 async def main():
     """Main function"""
@@ -545,9 +920,16 @@ async def main():
         await bot.run()
 
 if __name__ == "__main__":
+    # Prefer uvloop's libuv event loop when available (not on Windows)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("👋 Bot terminated by user")
     except Exception as e:
-        logger.error(f"❌ Fatal error: {e}") 
+        logger.error("❌ Fatal error: %s", e) 